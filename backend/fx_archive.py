@@ -0,0 +1,220 @@
+import os
+import json
+import bisect
+import numpy as np
+import pandas as pd
+
+# One fixed-width record per bar: epoch nanoseconds (UTC) followed by OHLC.
+# Open/High/Low are stored as NaN when the source only provides closes.
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+])
+INDEX_FILE = "index.json"
+
+def _pair_file(pair: str, first: int = None) -> str:
+    base = pair.replace("=", "_").replace("/", "_")
+    # Backfilled files are named after their first bar so they never clash with a mapped predecessor
+    return base + ".bin" if first is None else f"{base}_{first // 10**9}.bin"
+
+def _to_epoch_ns(ts: pd.Series) -> np.ndarray:
+    ts = pd.to_datetime(ts, utc=True).dt.tz_localize(None)
+    return ts.to_numpy(dtype="datetime64[ns]").view("int64")
+
+def read_index(root: str) -> dict:
+    """
+    Returns the archive index: {pair: {"file", "rows", "first", "last"}}, sorted by pair.
+    """
+    path = os.path.join(root, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def _write_index(root: str, index: dict):
+    # Write-then-rename so readers never see a half-written index
+    tmp = os.path.join(root, INDEX_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(root, INDEX_FILE))
+
+def to_records(df: pd.DataFrame) -> np.ndarray:
+    """
+    Packs one pair's bars into time-ordered archive records, dropping duplicate timestamps.
+    Expects 'timestamp' and 'close' columns; 'open', 'high', 'low' are optional.
+    """
+    ts = _to_epoch_ns(df["timestamp"])
+    order = np.argsort(ts, kind="stable")
+    ts = ts[order]
+    keep = np.ones(len(ts), dtype=bool)
+    keep[1:] = ts[1:] != ts[:-1]
+
+    rows = order[keep]
+    rec = np.empty(len(rows), dtype=RECORD_DTYPE)
+    rec["timestamp"] = ts[keep]
+    for col in ("open", "high", "low", "close"):
+        if col in df.columns:
+            rec[col] = df[col].to_numpy(dtype="float64")[rows]
+        else:
+            rec[col] = np.nan
+    return rec
+
+def _backfill(root: str, pair: str, entry: dict, older: np.ndarray) -> dict:
+    # Writes older bars + current history to a new file; the index switch makes it visible
+    first = int(older["timestamp"][0])
+    file = _pair_file(pair, first)
+    existing = _map(root, entry)
+    with open(os.path.join(root, file), "wb") as f:
+        f.write(older.tobytes())
+        f.write(np.ascontiguousarray(existing).tobytes())
+    del existing
+    return {"file": file, "rows": len(older) + entry["rows"], "first": first, "last": entry["last"]}
+
+def _revised(existing: np.ndarray, incoming: np.ndarray) -> int:
+    # Overlapping syncs resend archived bars; count only those that are missing or changed
+    if not len(incoming):
+        return 0
+    ts = np.asarray(existing["timestamp"])
+    pos = np.minimum(np.searchsorted(ts, incoming["timestamp"]), len(ts) - 1)
+    same = (ts[pos] == incoming["timestamp"]) & np.isclose(
+        np.asarray(existing["close"])[pos], incoming["close"], rtol=0, atol=0, equal_nan=True)
+    return int((~same).sum())
+
+def append_pair(root: str, pair: str, df: pd.DataFrame) -> int:
+    """
+    Adds a pair's bars to the archive. Bars newer than the last archived timestamp are appended,
+    and the newest archived bar may be replaced (today's bar is provisional until the close).
+    Bars older than the first archived timestamp are backfilled into a rewritten file.
+    History in between is never rewritten and incoming bars there are skipped.
+    Returns the number of rows written.
+    """
+    os.makedirs(root, exist_ok=True)
+    index = read_index(root)
+    entry = index.get(pair, {"file": _pair_file(pair), "rows": 0, "first": None, "last": None})
+    old_file = entry["file"]
+
+    rec = to_records(df)
+    written = 0
+    if entry["first"] is not None and len(rec) and rec["timestamp"][0] < entry["first"]:
+        older = rec["timestamp"] < entry["first"]
+        entry = _backfill(root, pair, entry, rec[older])
+        written += older.sum()
+        rec = rec[~older]
+
+    rows = entry["rows"]
+    if entry["last"] is not None:
+        stale = rec["timestamp"] < entry["last"]
+        revised = _revised(_map(root, entry), rec[stale])
+        if revised:
+            print(f"Warning: skipping {revised} {pair} bars that differ from archived history")
+        rec = rec[~stale]
+        if len(rec) and rec["timestamp"][0] == entry["last"]:
+            # Rewrite the newest record in place with the refreshed bar
+            rows -= 1
+
+    if len(rec):
+        path = os.path.join(root, entry["file"])
+        # Write in place: shrinking a file that dashboards have mapped exposes zeroed
+        # records (or SIGBUS) on POSIX and fails outright on Windows
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(rows * RECORD_DTYPE.itemsize)
+            f.write(rec.tobytes())
+            # Only now drop any tail left behind by an interrupted write; the new end is
+            # never below the indexed (mapped) size
+            if f.tell() < os.fstat(f.fileno()).st_size:
+                f.truncate()
+
+        entry["rows"] = rows + len(rec)
+        if entry["first"] is None:
+            entry["first"] = int(rec["timestamp"][0])
+        entry["last"] = int(rec["timestamp"][-1])
+        written += len(rec)
+    if not written:
+        return 0
+
+    index[pair] = entry
+    _write_index(root, index)
+    if entry["file"] != old_file:
+        try:
+            os.remove(os.path.join(root, old_file))
+        except OSError:
+            pass  # Still mapped by a running dashboard (Windows); it is no longer indexed
+    return int(written)
+
+def write_archive(root: str, df: pd.DataFrame) -> int:
+    """
+    Appends a long-format frame (timestamp, pair, close[, open, high, low]) to the archive.
+    """
+    written = 0
+    for pair, pdf in df.groupby("pair", sort=True):
+        written += append_pair(root, pair, pdf)
+    return written
+
+def open_pair(root: str, pair: str) -> np.ndarray:
+    """
+    Maps a pair's file read-only. Only rows recorded in the index are exposed.
+    """
+    return _map(root, read_index(root)[pair])
+
+def _map(root: str, entry: dict) -> np.ndarray:
+    if entry["rows"] == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(os.path.join(root, entry["file"]), dtype=RECORD_DTYPE, mode="r", shape=(entry["rows"],))
+
+def open_archive(root: str) -> dict:
+    """
+    Maps every archived pair: {pair: memmap}.
+    """
+    return {pair: open_pair(root, pair) for pair in read_index(root)}
+
+def window_bounds(rec: np.ndarray, start=None, end=None) -> tuple:
+    """
+    Binary-searches [start, end) on the timestamp column, touching O(log n) pages.
+    Bounds may be pandas/datetime timestamps or epoch nanoseconds.
+    """
+    ts = rec["timestamp"]
+    lo = 0 if start is None else bisect.bisect_left(ts, _as_epoch_ns(start))
+    hi = len(ts) if end is None else bisect.bisect_left(ts, _as_epoch_ns(end), lo)
+    return lo, hi
+
+def slice_window(rec: np.ndarray, start=None, end=None) -> np.ndarray:
+    """
+    Returns a zero-copy view of the records falling in [start, end).
+    """
+    lo, hi = window_bounds(rec, start, end)
+    return rec[lo:hi]
+
+def _as_epoch_ns(t) -> int:
+    if isinstance(t, (int, np.integer)):
+        return int(t)
+    t = pd.Timestamp(t)
+    if t.tzinfo is None:
+        t = t.tz_localize("UTC")
+    return t.value
+
+def to_frame(rec: np.ndarray, pair: str) -> pd.DataFrame:
+    """
+    Materializes records in the dashboard's long format (timestamp, pair, close, ...).
+    """
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(rec["timestamp"], unit="ns", utc=True),
+        "pair": pair,
+        "close": rec["close"],
+        "open": rec["open"],
+        "high": rec["high"],
+        "low": rec["low"],
+    })
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="FX Price Archive")
+    parser.add_argument("root", type=str, help="Archive directory")
+    args = parser.parse_args()
+
+    for pair, entry in read_index(args.root).items():
+        first = pd.Timestamp(entry["first"], tz="UTC") if entry["first"] is not None else None
+        last = pd.Timestamp(entry["last"], tz="UTC") if entry["last"] is not None else None
+        print(f"{pair}: {entry['rows']:,} rows ({first} -> {last})")
@@ -2,9 +2,10 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime
 
-def fetch_fx_data(pairs: list[str], period: str = "5y") -> pd.DataFrame:
+def fetch_fx_data(pairs: list[str], period: str = "5y", ohlc: bool = False) -> pd.DataFrame:
     """
     Fetches historical FX data using yfinance and standardizes the format.
+    With ohlc=True the open/high/low columns are kept alongside close.
     """
     all_data = []
     
@@ -19,8 +20,8 @@ def fetch_fx_data(pairs: list[str], period: str = "5y") -> pd.DataFrame:
             
         # Clean and format data
         df = df.reset_index()
-        df = df[['Date', 'Close']]
-        df.columns = ['timestamp', 'close']
+        df = df[['Date', 'Open', 'High', 'Low', 'Close']]
+        df.columns = ['timestamp', 'open', 'high', 'low', 'close']
         df['pair'] = pair
         
         # Ensure timestamp is TZ-aware (yfinance usually returns UTC-aware or TZ-naive depending on source)
@@ -35,7 +36,10 @@ def fetch_fx_data(pairs: list[str], period: str = "5y") -> pd.DataFrame:
         raise ValueError("Failed to fetch data for any of the requested pairs.")
         
     result_df = pd.concat(all_data, ignore_index=True)
-    return result_df[['timestamp', 'pair', 'close']]
+    columns = ['timestamp', 'pair', 'close']
+    if ohlc:
+        columns += ['open', 'high', 'low']
+    return result_df[columns]
 
 if __name__ == "__main__":
     # Test fetch
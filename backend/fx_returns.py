@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# label -> horizon. An int counts observations back (trading days);
+# a pd.DateOffset is subtracted from the latest timestamp (calendar).
+DEFAULT_HORIZONS = {
+    "1D": 1,
+    "7D": pd.DateOffset(days=7),
+    "30D": pd.DateOffset(days=30),
+    "90D": pd.DateOffset(days=90),
+    "1Y": pd.DateOffset(years=1),
+    "3Y": pd.DateOffset(years=3),
+    "5Y": pd.DateOffset(years=5),
+}
+
+def _epoch_seconds(ts) -> np.ndarray:
+    ts = pd.DatetimeIndex(pd.to_datetime(ts, utc=True)).tz_localize(None)
+    return ts.to_numpy(dtype="datetime64[s]").view("int64")
+
+def compute_returns_matrix(df: pd.DataFrame, horizons: dict = None) -> pd.DataFrame:
+    """
+    Computes percentage returns for every pair and horizon in one vectorized pass.
+    Expects a long frame with 'timestamp', 'pair' and 'close' columns.
+    Calendar horizons compare against the last close at or before (latest - offset);
+    trading horizons compare against the close n observations back.
+    Returns a frame indexed by pair with 'last_close', 'last_timestamp' and one column
+    per horizon; NaN where history is too short.
+    """
+    horizons = DEFAULT_HORIZONS if horizons is None else horizons
+    if df.empty:
+        out = pd.DataFrame(columns=list(horizons), dtype=float)
+        out.insert(0, "last_timestamp", pd.Series(dtype="datetime64[ns, UTC]"))
+        out.insert(0, "last_close", pd.Series(dtype=float))
+        return out
+
+    df = df.sort_values(["pair", "timestamp"], kind="stable")
+    pairs, codes = np.unique(df["pair"].to_numpy(), return_inverse=True)
+    ts = _epoch_seconds(df["timestamp"])
+    close = df["close"].to_numpy(dtype="float64")
+
+    # Group boundaries of each pair within the sorted arrays
+    start = np.searchsorted(codes, np.arange(len(pairs)), side="left")
+    end = np.searchsorted(codes, np.arange(len(pairs)), side="right")
+    last_idx = end - 1
+    last_close = close[last_idx]
+    last_ts = pd.to_datetime(ts[last_idx], unit="s")
+
+    # Composite (pair, time) key so one searchsorted covers all pairs at once.
+    # A target before a pair's first bar lands in the previous pair and is masked below.
+    t0 = ts.min()
+    span = ts.max() - t0 + 1
+    keys = codes * span + (ts - t0)
+
+    out = {"last_close": last_close, "last_timestamp": last_ts.tz_localize("UTC").astype("datetime64[ns, UTC]")}
+    for label, horizon in horizons.items():
+        if isinstance(horizon, (int, np.integer)):
+            base_idx = last_idx - int(horizon)
+        else:
+            target = _epoch_seconds((last_ts - horizon).tz_localize("UTC"))
+            base_idx = np.searchsorted(keys, np.arange(len(pairs)) * span + (target - t0), side="right") - 1
+        valid = base_idx >= start
+        base = close[np.where(valid, base_idx, last_idx)]
+        out[label] = np.where(valid, (last_close - base) / base * 100, np.nan)
+
+    return pd.DataFrame(out, index=pd.Index(pairs, name="pair"))
@@ -5,6 +5,7 @@ import pandas as pd
 import requests
 from dotenv import load_dotenv
 from fx_fetcher import fetch_fx_data
+from fx_archive import write_archive
 
 load_dotenv()
 SUPABASE_URL, SUPABASE_KEY = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
@@ -51,20 +52,27 @@ def upsert_fx_data(df: pd.DataFrame):
         print(f"Error during upsert: {e}")
         raise
 
-def run_ingestion(pairs: list[str], period: str = "5y"):
+def run_ingestion(pairs: list[str], period: str = "5y", archive_dir: str = None):
     """
-    Main ingestion flow: fetch -> upsert.
+    Main ingestion flow: fetch -> upsert (-> local archive append).
     """
     print(f"Starting ingestion for {pairs} over {period}...")
     try:
-        df = fetch_fx_data(pairs, period=period)
+        df = fetch_fx_data(pairs, period=period, ohlc=archive_dir is not None)
         
-        # Drop rows with NaN values which can cause 400 errors in Supabase
-        df = df.dropna()
+        # Drop rows without a close, which can cause 400 errors in Supabase.
+        # Missing open/high/low are fine: the archive stores them as NaN.
+        df = df.dropna(subset=['close'])
         
         # Drop duplicates in case yfinance returns some (rare but possible)
         df = df.drop_duplicates(subset=['timestamp', 'pair'])
 
+        if archive_dir is not None:
+            written = write_archive(archive_dir, df)
+            print(f"Appended {written} rows to archive at {archive_dir}.")
+            # fx_rates only stores closes
+            df = df[['timestamp', 'pair', 'close']]
+
         # Batch upsert if data is large
         chunk_size = 10
         for i in range(0, len(df), chunk_size):
@@ -99,6 +107,7 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="FX Data Ingestor")
     parser.add_argument("--period", type=str, default="5y", help="Period to fetch (e.g., 5y, 1mo, 1d)")
+    parser.add_argument("--archive", type=str, default=None, help="Also append to the local price archive in this directory")
     args = parser.parse_args()
     
-    run_ingestion(tickers, period=args.period)
+    run_ingestion(tickers, period=args.period, archive_dir=args.archive)
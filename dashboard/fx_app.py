@@ -2,11 +2,16 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import os
+import sys
 import requests
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, timezone
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from backend.fx_archive import open_archive, read_index, to_frame, to_records, window_bounds
+from backend.fx_returns import compute_returns_matrix, DEFAULT_HORIZONS
+
 TICKER_MAP = {"USDINR=X": "USD/INR"}
 REVERSE_TICKER_MAP = {v: k for k, v in TICKER_MAP.items()}
 
@@ -17,6 +22,7 @@ EXPLANATIONS = {
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+ARCHIVE_DIR = os.getenv("FX_ARCHIVE_DIR")
 PAGE_SIZE = 1000
 
 st.set_page_config(
@@ -157,6 +163,11 @@ section[data-testid="stSidebar"] {
 
 COLORS = ["#58a6ff", "#f0883e", "#3fb950", "#ff7b72", "#d2a8ff"]
 
+SNAPSHOT_HORIZONS = ["1D", "7D", "30D", "90D", "1Y"]
+SNAPSHOT_LOOKBACK = pd.DateOffset(years=1)  # longest snapshot horizon
+MA_LOOKBACK = 50                            # rows of warm-up for the longest moving average
+VOL_LOOKBACK = 504 + 30                     # 2Y of 30-row rolling vol windows
+
 @st.cache_data(ttl=600, show_spinner="Fetching latest rates...")
 def load_all_data():
     headers = {
@@ -185,21 +196,79 @@ def load_all_data():
     df = pd.DataFrame(all_rows)
     df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
     df["close"] = df["close"].astype(float)
-    return df
+    return {pair: to_records(pdf) for pair, pdf in df.groupby("pair")}
 
+@st.cache_data(ttl=600, show_spinner=False)
+def supabase_bounds() -> dict:
+    """
+    Returns {pair: (first, last)} epoch nanoseconds of each mapped pair held in Supabase.
+    """
+    headers = {
+        "apikey": SUPABASE_KEY,
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+    }
+    bounds = {}
+    for pair in TICKER_MAP:
+        edges = []
+        for order in ("timestamp.asc", "timestamp.desc"):
+            r = requests.get(
+                f"{SUPABASE_URL}/rest/v1/fx_rates",
+                params={"select": "timestamp", "pair": f"eq.{pair}", "order": order, "limit": 1},
+                headers=headers,
+                timeout=30,
+            )
+            r.raise_for_status()
+            rows = r.json()
+            if rows:
+                edges.append(pd.Timestamp(rows[0]["timestamp"]).value)
+        if edges:
+            bounds[pair] = tuple(edges)
+    return bounds
+
+def archive_covers(index: dict, bounds: dict) -> bool:
+    # The archive must span at least the same history as Supabase for every mapped pair
+    for pair, (db_first, db_last) in bounds.items():
+        entry = index.get(pair)
+        if entry is None or entry["first"] is None:
+            return False
+        if entry["first"] > db_first or entry["last"] < db_last:
+            return False
+    return True
+
+def load_price_data() -> dict:
+    """
+    Returns {pair: time-ordered archive records}. With FX_ARCHIVE_DIR set these are
+    memory-mapped, so the windows sliced below are zero-copy views and concurrent
+    dashboard processes share the OS page cache.
+    """
+    if ARCHIVE_DIR:
+        index = read_index(ARCHIVE_DIR)
+        if any(pair in TICKER_MAP and e["rows"] for pair, e in index.items()):
+            # The scheduled sync only writes to Supabase, and a short first --archive run
+            # only holds recent history: fall back to Supabase unless the archive covers it
+            try:
+                covered = archive_covers(index, supabase_bounds())
+            except requests.RequestException:
+                covered = True  # Supabase unreachable: the archive is the best we have
+            if covered:
+                return open_archive(ARCHIVE_DIR)
+    return load_all_data()
 
 # ─── Analytics helpers ────────────────────────────────────────────────────────
-def filter_window(df: pd.DataFrame, days: int) -> pd.DataFrame:
-    cutoff = datetime.now(tz=timezone.utc) - timedelta(days=days)
-    return df[df["timestamp"] >= cutoff].copy()
-
-def compute_returns(s: pd.Series) -> dict:
-    last = s.iloc[-1]
-    def ret(n):
-        if len(s) > n:
-            return (last - s.iloc[-n]) / s.iloc[-n] * 100
-        return None
-    return {"1D": ret(2), "7D": ret(7), "30D": ret(30), "90D": ret(90), "1Y": ret(252)}
+def filter_window(rec: np.ndarray, days: int, pad: int = 0) -> np.ndarray:
+    # Binary-searched view of the last `days`, plus `pad` earlier rows for indicator warm-up
+    lo, _ = window_bounds(rec, datetime.now(tz=timezone.utc) - timedelta(days=days))
+    return rec[max(lo - pad, 0):]
+
+def snapshot_frame(rec: np.ndarray, pair: str) -> pd.DataFrame:
+    last_ts = pd.Timestamp(int(rec["timestamp"][-1]), tz="UTC")
+    lo, _ = window_bounds(rec, last_ts - SNAPSHOT_LOOKBACK)
+    # One earlier row so the base close on or before the 1Y target is included
+    return to_frame(rec[max(lo - 1, 0):], pair)
+
+def fmt_return(v):
+    if pd.isna(v): return "N/A", "tag-neu"
+    return f"{v:+.2f}%", "tag-pos" if v >= 0 else "tag-neg"
 
 def compute_drawdown_stats(s: pd.Series, ts: pd.Series):
     peak = s.cummax()
@@ -225,18 +294,18 @@ def rolling_vol_series(s: pd.Series, window=30) -> pd.Series:
 
 # --- Main App Logic ---
 try:
-    df_all  = load_all_data()
+    price_data = load_price_data()
 except Exception as e:
     st.error(f"❌ Failed to load data: {e}")
     st.stop()
 
-if df_all.empty:
+# Filter out pairs not in our mapping
+price_data = {pair: rec for pair, rec in price_data.items() if pair in TICKER_MAP and len(rec)}
+
+if not price_data:
     st.error("No data. Run the ingestion script first.")
     st.stop()
 
-# Filter out pairs not in our mapping
-df_all = df_all[df_all["pair"].isin(TICKER_MAP.keys())]
-
 # ─── Sidebar ──────────────────────────────────────────────────────────────────
 with st.sidebar:
     # 🎨 Advanced CSS: Lock Scroll + Flex-Fill
@@ -288,7 +357,7 @@ with st.sidebar:
     
     # 🏷️ Selection Logic (Dynamic)
     # Automatically identify available pairs from the database
-    available_tickers = df_all["pair"].unique().tolist()
+    available_tickers = list(price_data)
     available_labels = [TICKER_MAP.get(t, t.split('=')[0].replace('USD', 'USD/')) for t in available_tickers]
     
     selected_label = st.selectbox("Currency Pair", options=available_labels, index=0)
@@ -311,7 +380,7 @@ with st.sidebar:
     # ⚓ Footer
     st.markdown(f"""
         <div class="sidebar-bottom">
-            <span style="opacity: 0.3; font-size: 0.75rem;">Last sync: {df_all['timestamp'].max().strftime('%d %b %Y')}</span>
+            <span style="opacity: 0.3; font-size: 0.75rem;">Last sync: {pd.Timestamp(max(int(rec["timestamp"][-1]) for rec in price_data.values()), tz="UTC").strftime('%d %b %Y')}</span>
         </div>
     """, unsafe_allow_html=True)
 
@@ -320,9 +389,6 @@ if not selected_pairs:
     st.info("👈 Select at least one currency pair.")
     st.stop()
 
-df_window = filter_window(df_all, window_days)
-df_window = df_window[df_window["pair"].isin(selected_pairs)]
-
 # ─── Page Header ──────────────────────────────────────────────────────────────
 st.markdown("## 💹 FOREX Analytics Dashboard")
 st.markdown("---")
@@ -332,21 +398,18 @@ st.markdown("---")
 # ═══════════════════════════════════════════════════════════════════════
 st.markdown("### 📍 Market Snapshot")
 
+df_snapshot = pd.concat([snapshot_frame(price_data[pair], pair) for pair in selected_pairs], ignore_index=True)
+returns_matrix = compute_returns_matrix(df_snapshot, {h: DEFAULT_HORIZONS[h] for h in SNAPSHOT_HORIZONS})
+
 for pair in selected_pairs:
     label = TICKER_MAP[pair]
-    pdf = df_all[df_all["pair"] == pair].sort_values("timestamp")
-    if pdf.empty: continue
-    rets = compute_returns(pdf["close"])
-    last_price = pdf["close"].iloc[-1]
-    
-    def get_fmt(v):
-        if v is None: return "N/A", "tag-neu"
-        return f"{v:+.2f}%", "tag-pos" if v >= 0 else "tag-neg"
+    if pair not in returns_matrix.index: continue
+    last_price = returns_matrix.at[pair, "last_close"]
 
-    r1d, c1d = get_fmt(rets.get("1D"))
-    r7d, c7d = get_fmt(rets.get("7D"))
-    r30d, c30d = get_fmt(rets.get("30D"))
-    r90d, c90d = get_fmt(rets.get("90D"))
+    return_items = ""
+    for h in SNAPSHOT_HORIZONS:
+        r, c = fmt_return(returns_matrix.at[pair, h])
+        return_items += f'<div class="return-item"><div class="return-label">{h}</div><div class="return-value {c}">{r}</div></div>'
 
     st.markdown(f"""
     <div class="snapshot-card">
@@ -355,10 +418,7 @@ for pair in selected_pairs:
             <div class="current-price">{last_price:,.4f}</div>
         </div>
         <div class="snapshot-right">
-            <div class="return-item"><div class="return-label">1D</div><div class="return-value {c1d}">{r1d}</div></div>
-            <div class="return-item"><div class="return-label">7D</div><div class="return-value {c7d}">{r7d}</div></div>
-            <div class="return-item"><div class="return-label">30D</div><div class="return-value {c30d}">{r30d}</div></div>
-            <div class="return-item"><div class="return-label">90D</div><div class="return-value {c90d}">{r90d}</div></div>
+            {return_items}
         </div>
     </div>
     """, unsafe_allow_html=True)
@@ -373,8 +433,8 @@ fig_trend = make_subplots(specs=[[{"secondary_y": True}]])
 
 for i, pair in enumerate(selected_pairs):
     label = TICKER_MAP[pair]
-    pdf_full = df_all[df_all["pair"] == pair].sort_values("timestamp").reset_index(drop=True)
-    pdf_win = df_window[df_window["pair"] == pair].sort_values("timestamp").reset_index(drop=True)
+    pdf_full = to_frame(filter_window(price_data[pair], window_days, pad=MA_LOOKBACK - 1), pair)
+    pdf_win = to_frame(filter_window(price_data[pair], window_days), pair)
     if pdf_win.empty: continue
 
     c = COLORS[i % len(COLORS)]
@@ -441,7 +501,8 @@ vol_cols = st.columns(len(selected_pairs))
 
 for i, pair in enumerate(selected_pairs):
     label = TICKER_MAP[pair]
-    pdf_full = df_all[df_all["pair"] == pair].sort_values("timestamp").reset_index(drop=True)
+    # Only the tail feeding the 2Y average is materialized
+    pdf_full = to_frame(price_data[pair][-VOL_LOOKBACK:], pair)
     if len(pdf_full) < 10: continue
     
     pct = pdf_full["close"].pct_change().dropna()
@@ -473,7 +534,7 @@ dd_stats = []
 
 for i, pair in enumerate(selected_pairs):
     label = TICKER_MAP[pair]
-    pdf = df_window[df_window["pair"] == pair].sort_values("timestamp").reset_index(drop=True)
+    pdf = to_frame(filter_window(price_data[pair], window_days), pair)
     if len(pdf) < 5: continue
     dd_series, max_dd, max_dd_date, duration = compute_drawdown_stats(pdf["close"], pdf["timestamp"])
     
@@ -517,14 +578,13 @@ cov_cols = st.columns(len(selected_pairs))
 
 for idx, pair in enumerate(selected_pairs):
     label = TICKER_MAP[pair]
-    pdf = df_all[df_all["pair"] == pair].sort_values("timestamp")
-    if pdf.empty: continue
-    ts = pdf["timestamp"]
+    rec = price_data[pair]
+    ts = pd.to_datetime(rec["timestamp"][[0, -1]], unit="ns", utc=True)
     with cov_cols[idx]:
         st.markdown(f"""
         <div style="background:#161b27; border:1px solid #30363d; border-radius:8px; padding:15px; font-size:0.85rem;">
             <b>{label}</b><br>
-            Records: {len(pdf):,}<br>
+            Records: {len(rec):,}<br>
             Range: {ts.min().strftime("%b %Y")} - {ts.max().strftime("%b %Y")}<br>
             Source: Yahoo Finance
         </div>